@@ -0,0 +1,115 @@
+"""
+Compare the file system calls made by the writer backends.
+
+Writes a synthetic playlist of TV show episodes to the configured layouts
+with each backend and counts the calls that resolve a path (open, mkdir,
+stat) and the path components passed to them, by wrapping the os
+functions for the duration of each run:
+
+    python3 bench_writers.py --episodes 5000
+    python3 bench_writers.py --dir /mnt/nas/bench    # on a network mount
+"""
+import argparse
+import builtins
+import os
+import shutil
+import sys
+import tempfile
+import time
+from file_operations import PathWriter, DirFdWriter, dir_fd_supported
+from layouts import load_layouts
+from media_processor import MediaProcessor
+
+# os functions whose calls resolve a path, and the builtin used by safe_write_file
+COUNTED_FUNCTIONS = ('open', 'mkdir', 'stat', 'lstat')
+
+def count_path_components(path):
+    """Count the path components the kernel has to resolve for a path"""
+    return len([part for part in os.fsdecode(path).split(os.sep) if part])
+
+def make_entries(episodes):
+    """Build (tvg_name, group_title, stream_url) tuples for synthetic episodes"""
+    entries = []
+    for number in range(episodes):
+        show = number // 100
+        season = number // 20 % 5 + 1
+        episode = number % 20 + 1
+        entries.append((f"مسلسل {show} S{season:02d} E{episode:02d}", f"Group {show % 10}",
+                        f"http://example.com/u/p/{number}.mp4"))
+    return entries
+
+class CallCounter:
+    """Wrap path-resolving calls while active, counting calls and path components"""
+
+    def __init__(self):
+        self.calls = 0
+        self.components = 0
+        self.originals = {}
+
+    def _wrap(self, func):
+        def counted(path, *args, **kwargs):
+            self.calls += 1
+            if isinstance(path, (str, bytes, os.PathLike)):
+                self.components += count_path_components(path)
+            return func(path, *args, **kwargs)
+        return counted
+
+    def __enter__(self):
+        for name in COUNTED_FUNCTIONS:
+            self.originals[(os, name)] = getattr(os, name)
+        self.originals[(builtins, 'open')] = builtins.open
+        for (module, name), func in self.originals.items():
+            setattr(module, name, self._wrap(func))
+        return self
+
+    def __exit__(self, *exc):
+        for (module, name), func in self.originals.items():
+            setattr(module, name, func)
+        self.originals = {}
+
+def run_backend(writer, entries, output_base, layouts):
+    """Write all entries with a writer; returns (seconds, calls, components, files)"""
+    for layout in layouts:
+        shutil.rmtree(layout.output_dir(output_base), ignore_errors=True)
+        os.makedirs(layout.output_dir(output_base))
+
+    processor = MediaProcessor(output_base, layouts, writer=writer)
+    with CallCounter() as counter:
+        start = time.perf_counter()
+        for tvg_name, group_title, stream_url in entries:
+            processor.process_entry(tvg_name, group_title, stream_url, True, skip_reason=None)
+        writer.close()
+        elapsed = time.perf_counter() - start
+    return elapsed, counter.calls, counter.components, processor.processed_count
+
+def main(argv=None):
+    """Main entry point; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Compare the file system calls made by the writer backends.")
+    parser.add_argument('--episodes', type=int, default=5000, help="episodes to write (default: 5000)")
+    parser.add_argument('--dir', help="directory to write to (default: a temporary directory)")
+    parser.add_argument('--layouts', help="layouts file (default: layouts.json)")
+    args = parser.parse_args(argv)
+
+    if not dir_fd_supported():
+        print("Directory handle writes are not supported on this platform.")
+        return 1
+
+    layouts = load_layouts(args.layouts)
+    entries = make_entries(args.episodes)
+    base_dir = args.dir or tempfile.mkdtemp(prefix='bench_writers-')
+    output_base = os.path.join(os.path.abspath(base_dir), 'bench')
+    try:
+        print(f"Writing {len(entries)} episodes to {len(layouts)} layouts in {base_dir}")
+        for writer in (PathWriter(), DirFdWriter()):
+            elapsed, calls, components, files = run_backend(writer, entries, output_base, layouts)
+            print(f"- {writer.name:<6} {elapsed:7.3f}s  {calls:>7} path calls  "
+                  f"{components:>8} path components  ({files} entries written)")
+    finally:
+        for layout in layouts:
+            shutil.rmtree(layout.output_dir(output_base), ignore_errors=True)
+        if not args.dir:
+            shutil.rmtree(base_dir, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
+import errno
 import os
 import shutil
 import stat
 import time
+from collections import OrderedDict
 
 def handle_remove_readonly(func, path, exc):
     """Handle read-only files during directory removal"""
@@ -33,6 +35,183 @@ def safe_write_file(file_path, content):
         print(f"Error writing file {file_path}: {str(e)}")
         return False
 
+class PathWriter:
+    """Writer backend using absolute paths for every operation"""
+
+    name = "path"
+
+    def add_root(self, root_dir):
+        """Register an existing output root; unused for path-based writes"""
+        pass
+
+    def create_dir(self, dir_path):
+        """Safely create directory and handle potential errors"""
+        return safe_create_dir(dir_path)
+
+    def write_file(self, file_path, content):
+        """Safely write content to file and handle potential errors"""
+        return safe_write_file(file_path, content)
+
+    def close(self):
+        """Nothing to release for path-based writes"""
+        pass
+
+    def get_summary_line(self):
+        """Get the backend in use for the completion summary"""
+        return f"- Writer: {self.name}"
+
+class DirFdWriter(PathWriter):
+    """
+    Writer backend creating files and directories relative to open
+    directory handles (openat/mkdirat through os.open and os.mkdir with
+    dir_fd), so the full path is only resolved once per directory.
+
+    Output roots registered with add_root are opened by absolute path;
+    directories below them are created and opened relative to their
+    parent's handle. Handles are opened with O_PATH where available, which
+    needs no read permission on the directory. Open handles are kept in an
+    LRU cache of at most max_open entries. Operations fall back to absolute
+    paths if dir_fd turns out not to be supported or permitted at runtime.
+
+    bench_writers.py compares the calls made by both backends.
+    """
+
+    name = "dirfd"
+
+    def __init__(self, max_open=64):
+        self.max_open = max(2, max_open)
+        self.dir_fds = OrderedDict()
+        self.roots = set()
+        self.fallback = False
+
+    def add_root(self, root_dir):
+        """Register an existing output root, where walks up the tree stop"""
+        self.roots.add(os.path.abspath(root_dir))
+
+    def _open_dir(self, dir_path):
+        """Get a handle for a directory, opening it relative to its parent if cached"""
+        fd = self.dir_fds.get(dir_path)
+        if fd is not None:
+            self.dir_fds.move_to_end(dir_path)
+            return fd
+
+        flags = getattr(os, 'O_PATH', os.O_RDONLY) | os.O_DIRECTORY | getattr(os, 'O_CLOEXEC', 0)
+        parent, name = os.path.split(dir_path)
+        parent_fd = self.dir_fds.get(parent)
+        if parent_fd is not None and name and dir_path not in self.roots:
+            self.dir_fds.move_to_end(parent)
+            fd = os.open(name, flags, dir_fd=parent_fd)
+        else:
+            fd = os.open(dir_path, flags)
+
+        self.dir_fds[dir_path] = fd
+        while len(self.dir_fds) > self.max_open:
+            _, old_fd = self.dir_fds.popitem(last=False)
+            os.close(old_fd)
+        return fd
+
+    def _make_dir(self, dir_path):
+        """Create a directory relative to its parent handle, creating parents as needed"""
+        if dir_path in self.dir_fds:
+            return
+        parent, name = os.path.split(dir_path)
+        if dir_path in self.roots or not name or parent == dir_path:
+            self._open_dir(dir_path)
+            return
+
+        # Walk up to the nearest cached ancestor or output root instead of
+        # resolving the parent's absolute path, which may not exist yet
+        if parent not in self.dir_fds:
+            self._make_dir(parent)
+        parent_fd = self._open_dir(parent)
+
+        try:
+            os.mkdir(name, dir_fd=parent_fd)
+        except FileExistsError:
+            pass
+        self._open_dir(dir_path)
+
+    def _write(self, name, content, dir_fd):
+        """Create or truncate a file relative to dir_fd and write content"""
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_CLOEXEC', 0)
+        fd = os.open(name, flags, 0o666, dir_fd=dir_fd)
+        try:
+            data = content.encode('utf-8')
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+    def _use_fallback(self, e):
+        """Switch to path-based writes for the rest of the run"""
+        print(f"Directory handle writes failed ({str(e)}), using paths.")
+        self.fallback = True
+
+    def create_dir(self, dir_path):
+        """Safely create directory relative to a cached parent handle"""
+        if self.fallback:
+            return super().create_dir(dir_path)
+        try:
+            self._make_dir(os.path.abspath(dir_path))
+            return True
+        except (NotImplementedError, PermissionError) as e:
+            self._use_fallback(e)
+            return super().create_dir(dir_path)
+        except Exception as e:
+            print(f"Error creating directory {dir_path}: {str(e)}")
+            return False
+
+    def write_file(self, file_path, content):
+        """Safely write content to file relative to a cached directory handle"""
+        if self.fallback:
+            return super().write_file(file_path, content)
+        try:
+            dir_path, name = os.path.split(os.path.abspath(file_path))
+            self._write(name, content, self._open_dir(dir_path))
+            return True
+        except (NotImplementedError, PermissionError) as e:
+            self._use_fallback(e)
+            return super().write_file(file_path, content)
+        except Exception as e:
+            print(f"Error writing file {file_path}: {str(e)}")
+            return False
+
+    def close(self):
+        """Close all cached directory handles"""
+        while self.dir_fds:
+            _, fd = self.dir_fds.popitem()
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def get_summary_line(self):
+        """Get the backend in use for the completion summary"""
+        if self.fallback:
+            return f"- Writer: {self.name} (fell back to paths)"
+        return super().get_summary_line()
+
+def dir_fd_supported():
+    """Check whether the platform supports dir_fd for os.open and os.mkdir"""
+    return (hasattr(os, 'O_DIRECTORY') and
+            os.open in os.supports_dir_fd and
+            os.mkdir in os.supports_dir_fd)
+
+def get_writer(backend="auto"):
+    """
+    Create a writer backend: 'path', 'dirfd', or 'auto' to use dirfd where
+    the platform supports it
+    """
+    if backend == "path":
+        return PathWriter()
+    if backend not in ("dirfd", "auto"):
+        raise ValueError(f"Unknown writer backend '{backend}' (expected path, dirfd or auto)")
+    if dir_fd_supported():
+        return DirFdWriter()
+    if backend == "dirfd":
+        print("Directory handle writes are not supported on this platform, using paths.")
+    return PathWriter()
+
 def safe_remove_dir(dir_path):
     """Safely remove directory and all its contents with retries"""
     if not os.path.exists(dir_path):
@@ -103,18 +282,30 @@ def format_size(size):
         size /= 1024.0
     return f"{size:.1f} TB"
 
-def handle_existing_folders(grouped_dir, flat_dir):
+# Results of handle_existing_folders
+FOLDERS_CONTINUE = "continue"
+FOLDERS_SKIP = "skip"
+FOLDERS_FAILED = "failed"
+
+def handle_existing_folders(output_dirs, policy=None):
     """
     Handle existing output folders
-    Returns True if processing should continue, False if cancelled
+    output_dirs maps layout names to their output directories
+    policy ('delete', 'keep' or 'skip') answers the prompt for batch runs
+    Returns FOLDERS_CONTINUE, FOLDERS_SKIP if cancelled or skipped by policy,
+    or FOLDERS_FAILED if old content couldn't be removed
     """
     existing_dirs = []
-    if os.path.exists(grouped_dir):
-        size = format_size(get_dir_size(grouped_dir))
-        existing_dirs.append(f"- Grouped directory ({size}): {grouped_dir}")
-    if os.path.exists(flat_dir):
-        size = format_size(get_dir_size(flat_dir))
-        existing_dirs.append(f"- Flat directory ({size}): {flat_dir}")
+    for name, dir_path in output_dirs.items():
+        if not os.path.exists(dir_path):
+            continue
+        if policy:
+            # Sizes only help someone answering the prompt, and walking large
+            # trees on every scheduled run is slow on network mounts
+            existing_dirs.append(f"- {name.capitalize()} directory: {dir_path}")
+        else:
+            size = format_size(get_dir_size(dir_path))
+            existing_dirs.append(f"- {name.capitalize()} directory ({size}): {dir_path}")
         
     if existing_dirs:
         print("\nWARNING: Existing output folders found:")
@@ -123,35 +314,41 @@ def handle_existing_folders(grouped_dir, flat_dir):
             
         while True:
             try:
-                choice = input("\nChoose an option:\n"
-                             "1. Delete old content and start fresh\n"
-                             "2. Keep old content and add to it\n"
-                             "3. Cancel operation\n"
-                             "Enter choice (1-3): ").strip()
+                if policy:
+                    print(f"Existing folder policy: {policy}")
+                    choice = {'delete': "1", 'keep': "2", 'skip': "3"}[policy]
+                else:
+                    choice = input("\nChoose an option:\n"
+                                 "1. Delete old content and start fresh\n"
+                                 "2. Keep old content and add to it\n"
+                                 "3. Cancel operation\n"
+                                 "Enter choice (1-3): ").strip()
                 
                 if choice == "1":
                     print("\nRemoving old content...")
                     success = True
-                    if os.path.exists(grouped_dir):
-                        success = success and safe_remove_dir(grouped_dir)
-                    if os.path.exists(flat_dir):
-                        success = success and safe_remove_dir(flat_dir)
+                    for dir_path in output_dirs.values():
+                        if os.path.exists(dir_path):
+                            success = success and safe_remove_dir(dir_path)
                         
                     if success:
                         print("Old content removed successfully.")
-                        return True
+                        return FOLDERS_CONTINUE
                     else:
                         print("Failed to remove old content. Operation cancelled.")
-                        return False
+                        return FOLDERS_FAILED
                 elif choice == "2":
                     print("\nKeeping existing content. New files will be added to existing folders.")
-                    return True
+                    return FOLDERS_CONTINUE
                 elif choice == "3":
-                    print("\nOperation cancelled by user.")
-                    return False
+                    print("\nLeaving existing content untouched." if policy else "\nOperation cancelled by user.")
+                    return FOLDERS_SKIP
                 else:
                     print("Please enter 1, 2, or 3")
+            except EOFError:
+                print("\nNo input available. Operation cancelled.")
+                return FOLDERS_SKIP
             except KeyboardInterrupt:
                 print("\nOperation cancelled by user.")
-                return False
-    return True
+                return FOLDERS_SKIP
+    return FOLDERS_CONTINUE
@@ -0,0 +1,183 @@
+import os
+import re
+
+RULES_FILE = "filter_rules.txt"
+
+INLINE_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+
+# Group references can't survive being combined into one alternation, since
+# group numbers shift and group names may clash between rules
+GROUP_REFERENCES = re.compile(r'(?<!\\)(?:\\\\)*(?:\\[1-9]|\\g<|\(\?P[<=]|\(\?<(?![=!])|\(\?\()')
+
+ACTIONS = ('include', 'exclude')
+FIELDS = ('group', 'title')
+OPERATORS = ('=', '~')
+
+class RuleFilter:
+    """
+    Include/exclude filter over group-titles and titles.
+
+    Rules are read from a plain text file, one rule per line:
+
+        exclude group = Adult 18+
+        exclude group ~ ^sports?\\b
+        exclude title ~ \\bcam\\b
+        include group ~ arabic
+
+    '=' matches the whole value, '~' is a regular expression searched
+    anywhere in the value. Both are case-insensitive. Lines starting with '#'
+    are comments. When any include rule exists for a field, entries must
+    match at least one of them.
+
+    All exact rules of a kind are collected into one set and all regex
+    rules of a kind are compiled into a single alternation, so every entry
+    costs at most one set lookup and one regex search per kind.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = []
+        self.match_counts = {}
+        self._exact = {}
+        self._patterns = {}
+        self._pattern_labels = {}
+        for rule in rules or []:
+            self.add_rule(*rule)
+        self.compile()
+
+    def add_rule(self, action, field, operator, value, label=None):
+        """Add a single rule; call compile() afterwards"""
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action '{action}' (expected include or exclude)")
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field '{field}' (expected group or title)")
+        if operator not in OPERATORS:
+            raise ValueError(f"Unknown operator '{operator}' (expected = or ~)")
+        if operator == '~':
+            # Validate the expression on its own and in its combined form,
+            # so errors point at the rule
+            if GROUP_REFERENCES.search(value):
+                raise ValueError("Named groups, backreferences and conditionals are not supported "
+                                 "in '~' rules; use plain (...) or (?:...) groups")
+            re.compile(value)
+            re.compile(f"(?P<r0>{scope_inline_flags(value)})", re.IGNORECASE)
+        label = label or f"{action} {field} {operator} {value}"
+        self.rules.append((action, field, operator, value, label))
+        self.match_counts.setdefault(label, 0)
+
+    def compile(self):
+        """Build the lookup sets and combined regex alternations"""
+        self._exact = {}
+        self._patterns = {}
+        self._pattern_labels = {}
+        alternations = {}
+
+        for action, field, operator, value, label in self.rules:
+            key = (action, field)
+            if operator == '=':
+                self._exact.setdefault(key, {}).setdefault(value.strip().casefold(), label)
+            else:
+                parts = alternations.setdefault(key, [])
+                group_name = f"r{len(parts)}"
+                parts.append(f"(?P<{group_name}>{scope_inline_flags(value)})")
+                self._pattern_labels.setdefault(key, {})[group_name] = label
+
+        for key, parts in alternations.items():
+            self._patterns[key] = re.compile("|".join(parts), re.IGNORECASE)
+
+    def _find(self, action, field, value):
+        """Return the label of the first rule matching value, or None"""
+        key = (action, field)
+        exact = self._exact.get(key)
+        if exact:
+            label = exact.get(value.strip().casefold())
+            if label:
+                return label
+
+        pattern = self._patterns.get(key)
+        if pattern:
+            match = pattern.search(value)
+            if match:
+                return self._pattern_labels[key][match.lastgroup]
+        return None
+
+    def _has_includes(self, field):
+        """Check whether any include rule exists for a field"""
+        key = ('include', field)
+        return key in self._exact or key in self._patterns
+
+    def match(self, title, group_title):
+        """
+        Check an entry against the rules.
+        Returns the label of the rule that rejects it, or None if it passes.
+        """
+        for field, value in (('group', group_title), ('title', title)):
+            value = value or ""
+            label = self._find('exclude', field, value)
+            if label:
+                return label
+            if self._has_includes(field) and not self._find('include', field, value):
+                return f"no include {field} rule matched"
+        return None
+
+    def record(self, label):
+        """Count a match for the given rule label"""
+        self.match_counts[label] = self.match_counts.get(label, 0) + 1
+
+    def reset_counts(self):
+        """Reset the per-rule match counters"""
+        self.match_counts = {label: 0 for label in self.match_counts}
+
+    def get_summary_lines(self):
+        """Get per-rule match counters for the completion summary"""
+        return [f"  {count:>6}  {label}"
+                for label, count in sorted(self.match_counts.items(), key=lambda item: -item[1])
+                if count]
+
+def scope_inline_flags(pattern):
+    """
+    Turn leading global flags like '(?i)' into a scoped group, since global
+    flags are only allowed at the very start of the combined expression
+    """
+    match = INLINE_FLAGS.match(pattern)
+    if not match:
+        return pattern
+    return f"(?{match.group(1)}:{pattern[match.end():]})"
+
+def parse_rule_line(line):
+    """
+    Parse a single rule line.
+    Returns (action, field, operator, value) or None for blank/comment lines
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    parts = line.split(None, 3)
+    if len(parts) < 4:
+        raise ValueError(f"Expected '<include|exclude> <group|title> <=|~> <value>', got '{line}'")
+    action, field, operator, value = parts
+    return action.lower(), field.lower(), operator, value.strip()
+
+def load_rule_filter(rules_path=None):
+    """
+    Load filter rules from a file.
+    Returns a RuleFilter, or None if there is no rules file
+    """
+    rules_path = rules_path or os.path.join(os.getcwd(), RULES_FILE)
+    if not os.path.isfile(rules_path):
+        return None
+
+    rule_filter = RuleFilter()
+    with open(rules_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                rule = parse_rule_line(line)
+                if rule:
+                    rule_filter.add_rule(*rule)
+            except (ValueError, re.error) as e:
+                raise ValueError(f"{rules_path}:{line_number}: {str(e)}")
+    try:
+        rule_filter.compile()
+    except re.error as e:
+        raise ValueError(f"{rules_path}: rules can't be combined: {str(e)}")
+    return rule_filter
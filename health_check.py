@@ -0,0 +1,267 @@
+import base64
+import http.client
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote, urljoin, urlsplit
+
+HEALTH_CACHE_FILE = ".strm_health_cache.json"
+
+# Statuses that mean the server doesn't allow HEAD, so retry with a ranged GET
+HEAD_UNSUPPORTED = (400, 403, 405, 406, 501)
+
+# Client errors that may clear up on their own, so aren't cached as dead
+TRANSIENT_STATUSES = (408, 425, 429)
+
+# Redirects are followed to the final target, up to MAX_REDIRECTS hops
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 3
+
+# Characters left as they are when percent-encoding the request target
+TARGET_SAFE = "/%:@!$&'()*+,;=~"
+
+class HostPool:
+    """
+    Keep-alive connections and rate limiting for a single host.
+
+    At most max_connections requests run against the host at once, and
+    requests are spaced at least min_interval seconds apart.
+    """
+
+    def __init__(self, scheme, host, port=None, max_connections=4, min_interval=0, timeout=10):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.idle = []
+        self.lock = threading.Lock()
+        self.next_request_time = 0
+
+    def _new_connection(self):
+        """Open a new connection to the host"""
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _wait_for_turn(self):
+        """Sleep until the rate limit allows the next request"""
+        if not self.min_interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_request_time)
+            self.next_request_time = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def request(self, method, target, headers):
+        """
+        Send a request on a pooled connection
+        Returns the response status and Location header
+        """
+        with self.slots:
+            self._wait_for_turn()
+            with self.lock:
+                conn = self.idle.pop() if self.idle else None
+            reused = conn is not None
+
+            while True:
+                conn = conn or self._new_connection()
+                try:
+                    conn.request(method, target, headers=headers)
+                    response = conn.getresponse()
+                    break
+                except (http.client.HTTPException, ConnectionError):
+                    conn.close()
+                    conn = None
+                    # A kept-alive connection may have been closed by the server
+                    if not reused:
+                        raise
+                    reused = False
+                except Exception:
+                    conn.close()
+                    raise
+
+            # Only HEAD responses are read to the end; a streamed GET body can be
+            # endless, so that connection isn't reused
+            if method == 'HEAD' and not response.will_close:
+                response.read()
+                with self.lock:
+                    self.idle.append(conn)
+            else:
+                conn.close()
+            return response.status, response.getheader('Location')
+
+    def close(self):
+        """Close all idle connections"""
+        with self.lock:
+            while self.idle:
+                self.idle.pop().close()
+
+class URLHealthChecker:
+    """
+    Concurrent stream URL checker.
+
+    URLs are probed with HEAD (or a one-byte ranged GET where HEAD isn't
+    allowed) from a thread pool, with a connection pool and rate limit per
+    host. Redirects are followed, so a URL is judged by its final target.
+    Definite answers (2xx alive, 4xx dead) are cached in a JSON file for
+    ttl seconds so unchanged URLs aren't probed again on the next run.
+    Timeouts, connection errors, 5xx responses and too many redirects
+    count as dead for this run only and are probed again next time.
+    """
+
+    def __init__(self, workers=16, per_host=4, rate_limit=0, timeout=10,
+                 ttl=24 * 60 * 60, cache_path=None):
+        self.workers = workers
+        self.per_host = per_host
+        self.min_interval = 1.0 / rate_limit if rate_limit else 0
+        self.timeout = timeout
+        self.ttl = ttl
+        self.cache_path = cache_path or os.path.join(os.getcwd(), HEALTH_CACHE_FILE)
+        self.cache = {}
+        self.pools = {}
+        self.pools_lock = threading.Lock()
+        self.probed_count = 0
+        self.cached_count = 0
+        self.dead_count = 0
+        self.unreachable_count = 0
+        self.load_cache()
+
+    def load_cache(self):
+        """Load cached results, dropping expired ones"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        self.cache = {url: entry for url, entry in cache.items()
+                      if isinstance(entry, list) and len(entry) == 2 and now - entry[0] < self.ttl}
+
+    def save_cache(self):
+        """Save results so the next run can skip unchanged URLs"""
+        try:
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.cache, f)
+            os.replace(tmp_path, self.cache_path)
+            return True
+        except Exception as e:
+            print(f"Error saving URL health cache {self.cache_path}: {str(e)}")
+            return False
+
+    def _get_pool(self, scheme, host, port):
+        """Get the connection pool for a host"""
+        key = (scheme, host, port)
+        with self.pools_lock:
+            pool = self.pools.get(key)
+            if pool is None:
+                pool = HostPool(scheme, host, port, self.per_host, self.min_interval, self.timeout)
+                self.pools[key] = pool
+            return pool
+
+    def _request(self, url):
+        """
+        Send a probe request for a single URL, without following redirects
+        Returns the response status and Location header
+        Raises ValueError for URLs that can't be requested
+        """
+        parts = urlsplit(url)
+        port = parts.port
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+
+        # Non-ASCII characters (e.g. Arabic titles in the path) must be
+        # percent-encoded to be sent in the request line
+        target = quote(parts.path or '/', safe=TARGET_SAFE)
+        if parts.query:
+            target += f"?{quote(parts.query, safe=TARGET_SAFE + '?')}"
+        headers = {'User-Agent': 'm3u2strm'}
+        if parts.username is not None:
+            # Credentials in the URL are sent as Basic auth, not to the socket
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            headers['Authorization'] = f"Basic {base64.b64encode(credentials.encode('utf-8')).decode('ascii')}"
+        pool = self._get_pool(parts.scheme, parts.hostname, port)
+
+        status, location = pool.request('HEAD', target, headers)
+        if status in HEAD_UNSUPPORTED:
+            status, location = pool.request('GET', target, dict(headers, Range='bytes=0-0'))
+        return status, location
+
+    def probe(self, url):
+        """
+        Probe a single URL, following redirects to the final target
+        Returns (alive, definite); only definite results are cached
+        """
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, location = self._request(url)
+                if status not in REDIRECT_STATUSES or not location:
+                    break
+                # IPTV providers commonly redirect to edge servers, which may be down
+                url = urljoin(url, location)
+            else:
+                return False, False
+        except (ValueError, http.client.InvalidURL):
+            # Malformed URLs can't become reachable, so they are definitely dead
+            return False, True
+        except (OSError, http.client.HTTPException):
+            return False, False
+        if status < 400:
+            return True, True
+        return False, status < 500 and status not in TRANSIENT_STATUSES
+
+    def check_many(self, urls):
+        """
+        Check URLs concurrently, using cached results where still valid
+        Returns a dict mapping each URL to True (alive) or False (dead)
+        """
+        results = {}
+        to_probe = []
+        now = time.time()
+        for url in dict.fromkeys(urls):
+            entry = self.cache.get(url)
+            if entry and now - entry[0] < self.ttl:
+                results[url] = entry[1]
+                self.cached_count += 1
+            else:
+                to_probe.append(url)
+
+        if to_probe:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for url, (alive, definite) in zip(to_probe, executor.map(self.probe, to_probe)):
+                    results[url] = alive
+                    if definite:
+                        self.cache[url] = [time.time(), alive]
+                    else:
+                        self.cache.pop(url, None)
+                        self.unreachable_count += 1
+            self.probed_count += len(to_probe)
+
+        self.dead_count += sum(1 for alive in results.values() if not alive)
+        return results
+
+    def get_summary_line(self):
+        """Get the checker statistics for the completion summary"""
+        return (f"- URL checks: {self.probed_count} probed, {self.cached_count} from cache, "
+                f"{self.dead_count} dead ({self.unreachable_count} unreachable, not cached)")
+
+    def get_report(self):
+        """Get the checker statistics for the run report"""
+        return {
+            'probed': self.probed_count,
+            'cached': self.cached_count,
+            'dead': self.dead_count,
+            'unreachable': self.unreachable_count
+        }
+
+    def close(self):
+        """Close pooled connections and save the cache"""
+        for pool in self.pools.values():
+            pool.close()
+        self.save_cache()
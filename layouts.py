@@ -0,0 +1,197 @@
+import json
+import os
+import string
+from utils import (sanitize_filename, extract_show_info, reorder_mixed_language,
+                   detect_language, extract_year)
+
+LAYOUTS_FILE = "layouts.json"
+
+SHOW_FIELDS = ('title', 'group', 'language', 'year', 'show', 'season', 'episode')
+MOVIE_FIELDS = ('title', 'group', 'language', 'year', 'movie')
+
+# Fields a show template needs to give every episode its own file
+SHOW_REQUIRED_FIELDS = ('season', 'episode')
+
+BUILTIN_LAYOUTS = {
+    'grouped': {
+        'suffix': '',
+        'shows': '{group}/{show}/Season {season}/S{season}E{episode}.strm',
+        'movies': '{group}/{movie}/movie.strm'
+    },
+    'flat': {
+        'suffix': '-flat',
+        'shows': '{show}/Season {season}/S{season}E{episode}.strm',
+        'movies': '{movie}/movie.strm'
+    },
+    'by-language': {
+        'suffix': '-by-language',
+        'shows': '{language}/{show}/Season {season}/S{season}E{episode}.strm',
+        'movies': '{language}/{movie}/movie.strm'
+    },
+    'by-year': {
+        'suffix': '-by-year',
+        'shows': '{year}/{show}/Season {season}/S{season}E{episode}.strm',
+        'movies': '{year}/{movie}/movie.strm'
+    }
+}
+
+DEFAULT_LAYOUTS = ['grouped', 'flat']
+
+# Example field values used to check templates when layouts are loaded
+SAMPLE_FIELDS = {
+    'title': 'Title',
+    'group': 'Group',
+    'language': 'Arabic',
+    'year': '2020',
+    'show': 'Show',
+    'season': '01',
+    'episode': '01',
+    'movie': 'Movie'
+}
+
+
+class Layout:
+    """
+    An output tree described by path templates over the entry fields.
+
+    Templates use '/' between path components and str.format placeholders,
+    e.g. '{group}/{show}/Season {season}/S{season}E{episode}.strm'.
+    Shows can use: title, group, language, year, show, season, episode.
+    Movies can use: title, group, language, year, movie.
+    The last component is the .strm file name; show templates must use
+    both season and episode.
+    The tree is written to '<playlist name><suffix>'.
+    """
+
+    def __init__(self, name, suffix, shows, movies):
+        self.name = name
+        self.suffix = suffix
+        self.shows = self._split_template(shows, SHOW_FIELDS, SHOW_REQUIRED_FIELDS)
+        self.movies = self._split_template(movies, MOVIE_FIELDS)
+
+    def _split_template(self, template, allowed_fields, required_fields=()):
+        """Split a template into path components and validate its placeholders"""
+        if not isinstance(template, str):
+            raise ValueError(f"Layout '{self.name}' has a template that isn't a string: {template!r}")
+        components = [part for part in template.split('/') if part]
+        if not components:
+            raise ValueError(f"Layout '{self.name}' has an empty template")
+        if not components[-1].endswith('.strm'):
+            raise ValueError(f"Layout '{self.name}' template '{template}' must end in a .strm file name")
+
+        used_fields = set()
+        for component in components:
+            try:
+                fields = [field for _, field, _, _ in string.Formatter().parse(component)
+                          if field is not None]
+                used_fields.update(fields)
+                unknown = [field for field in fields if field not in allowed_fields]
+                if not unknown:
+                    # Format once so bad format specs fail now, not on the first entry
+                    component.format_map(SAMPLE_FIELDS)
+            except (ValueError, IndexError, KeyError, AttributeError) as e:
+                raise ValueError(f"Layout '{self.name}' has an invalid template component "
+                                 f"'{component}': {str(e)}")
+            if unknown:
+                raise ValueError(f"Layout '{self.name}' uses unknown field '{{{unknown[0]}}}' "
+                                 f"(available: {', '.join(allowed_fields)})")
+
+        # Without these, every episode of a show would be written to the same file
+        missing = [field for field in required_fields if field not in used_fields]
+        if missing:
+            raise ValueError(f"Layout '{self.name}' template '{template}' must use "
+                             f"{' and '.join('{' + field + '}' for field in missing)}")
+        return components
+
+    def output_dir(self, base_dir):
+        """Get the root directory of this layout's tree"""
+        return f"{base_dir}{self.suffix}"
+
+    def build_path(self, root_dir, fields, is_tvshow):
+        """
+        Build the .strm path for an entry inside root_dir
+        Returns None if a path component would be empty
+        """
+        components = []
+        for component in self.shows if is_tvshow else self.movies:
+            value = component.format_map(fields).strip()
+            if not value:
+                return None
+            components.append(value)
+        return os.path.join(root_dir, *components)
+
+def build_entry_fields(tvg_name, group_title, is_tvshow):
+    """
+    Parse and classify an entry once into the fields used by layout templates
+    Returns None if a show doesn't match the TV show format
+    """
+    fields = {
+        'title': sanitize_filename(reorder_mixed_language(tvg_name)),
+        'group': sanitize_filename(group_title),
+        'language': detect_language(tvg_name),
+        'year': extract_year(tvg_name) or 'Unknown'
+    }
+
+    if is_tvshow:
+        show_name, season, episode = extract_show_info(tvg_name)
+        if not (show_name and season and episode):
+            return None
+        fields['show'] = sanitize_filename(show_name)
+        fields['season'] = season.zfill(2)
+        fields['episode'] = episode.zfill(2)
+    else:
+        fields['movie'] = fields['title']
+    return fields
+
+def make_layout(name, definition=None):
+    """Create a layout from a definition dict, or from a built-in by name"""
+    if definition is None:
+        if name not in BUILTIN_LAYOUTS:
+            raise ValueError(f"Unknown layout '{name}' (built-in layouts: {', '.join(BUILTIN_LAYOUTS)})")
+        definition = BUILTIN_LAYOUTS[name]
+
+    missing = [key for key in ('shows', 'movies') if key not in definition]
+    if missing:
+        raise ValueError(f"Layout '{name}' is missing: {', '.join(missing)}")
+    suffix = definition.get('suffix', f"-{name}")
+    if not isinstance(suffix, str):
+        raise ValueError(f"Layout '{name}' has a suffix that isn't a string: {suffix!r}")
+    return Layout(name, suffix, definition['shows'], definition['movies'])
+
+def load_layouts(layouts_path=None):
+    """
+    Load the configured layouts.
+
+    The layouts file is a JSON list whose items are either built-in layout
+    names or objects with 'name', 'suffix', 'shows' and 'movies' keys.
+    Without a layouts file the grouped and flat layouts are used.
+    """
+    layouts_path = layouts_path or os.path.join(os.getcwd(), LAYOUTS_FILE)
+    if not os.path.isfile(layouts_path):
+        return [make_layout(name) for name in DEFAULT_LAYOUTS]
+
+    try:
+        with open(layouts_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{layouts_path}: {str(e)}")
+
+    if not isinstance(config, list) or not config:
+        raise ValueError(f"{layouts_path}: expected a non-empty list of layouts")
+
+    layouts = []
+    for item in config:
+        if isinstance(item, str):
+            layouts.append(make_layout(item))
+        elif isinstance(item, dict) and item.get('name'):
+            layouts.append(make_layout(item['name'], item))
+        else:
+            raise ValueError(f"{layouts_path}: each layout must be a name or an object with a 'name'")
+
+    names = [layout.name for layout in layouts]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{layouts_path}: layouts must have distinct names")
+    suffixes = [layout.suffix for layout in layouts]
+    if len(set(suffixes)) != len(suffixes):
+        raise ValueError(f"{layouts_path}: layouts must have distinct suffixes")
+    return layouts
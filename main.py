@@ -1,10 +1,99 @@
+import argparse
+import json
 import os
 import re
-from file_operations import count_media_entries, handle_existing_folders, safe_create_dir
-from media_processor import MediaProcessor
+import sys
+import time
+from itertools import islice
+from file_operations import (count_media_entries, handle_existing_folders, safe_create_dir, get_writer,
+                             FOLDERS_SKIP, FOLDERS_FAILED)
+from media_processor import MediaProcessor, QUARANTINE_SUFFIX
+from filters import load_rule_filter
+from layouts import load_layouts
+from health_check import URLHealthChecker
+
+# Writer backend for .strm files: 'path', 'dirfd' or 'auto'
+# 'dirfd' resolves each directory once and pays off on network filesystems
+WRITER_BACKEND = "path"
+
+# Optional stream URL health check before writing .strm files
+CHECK_URLS = False
+DEAD_URL_POLICY = "skip"  # 'skip' or 'quarantine' (write to '<name>-dead.m3u')
+URL_CHECK_WORKERS = 16
+URL_CHECK_PER_HOST = 4
+URL_CHECK_RATE_LIMIT = 0  # requests per second per host, 0 for no limit
+URL_CHECK_TTL = 24 * 60 * 60
+URL_CHECK_BATCH_SIZE = 200
+
+# Existing-folder policies for batch mode, mapped to the interactive choices
+EXISTING_POLICIES = ('delete', 'keep', 'skip')
+
+# Options that only make sense unattended, so they imply --batch
+BATCH_OPTIONS = ('playlists', 'limit', 'limit_for', 'existing', 'report')
+
+# Exit codes
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_FAILED = 2
+EXIT_CANCELLED = 130
+
+DEFAULT_SETTINGS = {
+    'batch': False,
+    'playlists': [],
+    'limit': 'all',
+    'limits': {},
+    'existing': 'keep',
+    'rules': None,
+    'layouts': None,
+    'writer': WRITER_BACKEND,
+    'check_urls': CHECK_URLS,
+    'dead_urls': DEAD_URL_POLICY,
+    'url_workers': URL_CHECK_WORKERS,
+    'url_per_host': URL_CHECK_PER_HOST,
+    'url_rate_limit': URL_CHECK_RATE_LIMIT,
+    'url_ttl': URL_CHECK_TTL,
+    'report': None
+}
+
+# Expected types of the settings, checked after merging the config file
+NONE_TYPE = type(None)
+SETTING_TYPES = {
+    'batch': bool,
+    'playlists': list,
+    'limit': (str, int),
+    'limits': dict,
+    'existing': str,
+    'rules': (str, NONE_TYPE),
+    'layouts': (str, NONE_TYPE),
+    'writer': str,
+    'check_urls': bool,
+    'dead_urls': str,
+    'url_workers': int,
+    'url_per_host': int,
+    'url_rate_limit': (int, float),
+    'url_ttl': int,
+    'report': (str, NONE_TYPE)
+}
+
+WRITER_BACKENDS = ('path', 'dirfd', 'auto')
+
+def parse_limit(value, media_count):
+    """
+    Resolve a batch-mode limit ('all' or a positive number) for a playlist
+    Returns the number of entries to process
+    """
+    value = str(value).strip().lower()
+    if value == 'all':
+        return media_count
+    if value.isdigit() and int(value) > 0:
+        return min(int(value), media_count)
+    raise ValueError(f"Invalid limit '{value}' (expected 'all' or a positive number)")
+
+def get_num_to_process(media_count, media_type, m3u_file, limit=None):
+    """Get the number of entries to process from the batch limit or user input"""
+    if limit is not None:
+        return parse_limit(limit, media_count)
 
-def get_num_to_process(media_count, media_type, m3u_file):
-    """Get the number of entries to process from user input"""
     while True:
         try:
             num_input = input(
@@ -18,15 +107,18 @@ def get_num_to_process(media_count, media_type, m3u_file):
                 return int(num_input)
             else:
                 print(f"Please enter 'all' or a number between 1 and {media_count}")
+        except EOFError:
+            print("\nNo input available. Use --batch to run without prompts.")
+            return None
         except KeyboardInterrupt:
             print("\nOperation cancelled by user.")
             return None
         except Exception as e:
             print(f"Invalid input. Please try again: {str(e)}")
 
-def process_entries(m3u_file_path, processor, num_to_process, is_tvshows):
-    """Process entries from the M3U file"""
-    stream_name = group_title = tvg_name = None
+def parse_m3u_entries(m3u_file_path):
+    """Yield (tvg_name, group_title, stream_url) for each entry in the M3U file"""
+    group_title = tvg_name = None
     
     with open(m3u_file_path, 'r', encoding='utf-8') as file:
         for line in file:
@@ -41,21 +133,51 @@ def process_entries(m3u_file_path, processor, num_to_process, is_tvshows):
                     group_title = group_title_match.group(1)
 
             elif line.startswith("http") and tvg_name and group_title:
-                processor.process_entry(tvg_name, group_title, line, is_tvshows)
+                yield tvg_name, group_title, line
+                group_title = tvg_name = None
+
+def process_entries(m3u_file_path, processor, num_to_process, is_tvshows, url_checker=None,
+                    show_progress=True):
+    """Process entries from the M3U file"""
+    entries = parse_m3u_entries(m3u_file_path)
+    
+    while processor.processed_count < num_to_process:
+        # With a URL checker, probe a batch of wanted entries concurrently
+        # before processing them; never take more than could still be needed
+        batch_size = URL_CHECK_BATCH_SIZE if url_checker else 1
+        batch = list(islice(entries, min(batch_size, num_to_process - processor.processed_count)))
+        if not batch:
+            break
+
+        # Run the filters once per entry; the verdict is reused when processing
+        skip_reasons = [processor.get_skip_reason(tvg_name, group_title)
+                        for tvg_name, group_title, url in batch]
+
+        alive = {}
+        if url_checker:
+            urls = [url for (tvg_name, group_title, url), skip_reason in zip(batch, skip_reasons)
+                    if not skip_reason]
+            alive = url_checker.check_many(urls)
+
+        for (tvg_name, group_title, url), skip_reason in zip(batch, skip_reasons):
+            processor.process_entry(tvg_name, group_title, url, is_tvshows, alive.get(url, True),
+                                    skip_reason)
+            if show_progress:
                 print(processor.get_progress_message(num_to_process), end='\r')
-                
-                if processor.processed_count >= num_to_process:
-                    break
-                    
-                stream_name = group_title = tvg_name = None
+            
+            if processor.processed_count >= num_to_process:
+                break
 
 def print_completion_summary(processor, m3u_file):
     """Print the completion summary"""
     for line in processor.get_completion_summary(m3u_file):
         print(line)
 
-def get_processing_info(m3u_files):
-    """Get processing information for all files upfront"""
+def get_processing_info(m3u_files, layouts, settings=None):
+    """
+    Get processing information for all files upfront
+    In batch mode the limits come from settings instead of prompts
+    """
     processing_info = {}
     
     print("\nChecking M3U files...")
@@ -80,69 +202,293 @@ def get_processing_info(m3u_files):
         print(f"\n'{m3u_file}' contains {media_count} {media_type}.")
         
         # Get number of entries to process
-        num_to_process = get_num_to_process(media_count, media_type, m3u_file)
+        limit = None
+        if settings and settings['batch']:
+            limit = settings['limits'].get(m3u_file, settings['limit'])
+        num_to_process = get_num_to_process(media_count, media_type, m3u_file, limit)
         if num_to_process is None:
             return None
             
-        # Setup output directories paths
-        output_dir_grouped = os.path.join(os.getcwd(), os.path.splitext(m3u_file)[0])
-        output_dir_flat = os.path.join(os.getcwd(), f"{os.path.splitext(m3u_file)[0]}-flat")
+        # Setup output directories paths, one per layout
+        output_base = os.path.join(os.getcwd(), os.path.splitext(m3u_file)[0])
+        output_dirs = {layout.name: layout.output_dir(output_base) for layout in layouts}
         
         # Store processing info
         processing_info[m3u_file] = {
             'path': m3u_file_path,
             'is_tvshows': is_tvshows,
             'num_to_process': num_to_process,
-            'output_dir_grouped': output_dir_grouped,
-            'output_dir_flat': output_dir_flat
+            'output_base': output_base,
+            'output_dirs': output_dirs
         }
     
     return processing_info
 
-def process_m3u_file(m3u_file, info):
-    """Process a single M3U file"""
+def process_m3u_file(m3u_file, info, layouts, rule_filter=None, url_checker=None, settings=None,
+                     results=None):
+    """
+    Process a single M3U file
+    Returns a result dict for the run report; it is also appended to results
+    right away, so an interrupted run still reports the partial counts
+    """
+    settings = settings or DEFAULT_SETTINGS
+    result = {
+        'playlist': m3u_file,
+        'status': 'skipped',
+        'num_to_process': info['num_to_process'],
+        'output_dirs': info['output_dirs']
+    }
+    if results is not None:
+        results.append(result)
+    start = time.monotonic()
+
     # Handle existing folders before any directory creation
-    if not handle_existing_folders(info['output_dir_grouped'], info['output_dir_flat']):
+    policy = settings['existing'] if settings['batch'] else None
+    folders = handle_existing_folders(info['output_dirs'], policy)
+    if folders == FOLDERS_FAILED:
+        print(f"\nSkipping '{m3u_file}' as old content couldn't be removed.")
+        result['status'] = 'failed'
+        return result
+    if folders == FOLDERS_SKIP:
         print(f"\nSkipping '{m3u_file}' as folder handling was cancelled.")
-        return
+        return result
     
     # Now create the directories if needed
-    if not safe_create_dir(info['output_dir_grouped']) or not safe_create_dir(info['output_dir_flat']):
+    if not all(safe_create_dir(output_dir) for output_dir in info['output_dirs'].values()):
         print(f"\nSkipping '{m3u_file}' due to directory creation errors.")
-        return
+        result['status'] = 'failed'
+        return result
 
     # Initialize media processor
-    processor = MediaProcessor(info['output_dir_grouped'], info['output_dir_flat'])
+    if rule_filter:
+        rule_filter.reset_counts()
+    writer = get_writer(settings['writer'])
+    processor = MediaProcessor(info['output_base'], layouts, rule_filter, writer,
+                               quarantine_dead=settings['dead_urls'] == "quarantine")
     
     try:
-        process_entries(info['path'], processor, info['num_to_process'], info['is_tvshows'])
-        print_completion_summary(processor, m3u_file)
+        result['status'] = 'running'
+        process_entries(info['path'], processor, info['num_to_process'], info['is_tvshows'], url_checker,
+                        show_progress=not settings['batch'])
+        result['status'] = 'completed'
+    except KeyboardInterrupt:
+        result['status'] = 'cancelled'
+        raise
     except Exception as e:
         print(f"\nError processing file: {str(e)}")
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    finally:
+        writer.close()
+        result.update(processor.get_report())
+        result['elapsed'] = round(time.monotonic() - start, 3)
+
+    if result['status'] == 'completed':
+        print_completion_summary(processor, m3u_file)
+    return result
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Convert M3U playlists in the current directory to STRM files.",
+        epilog="Without --batch or --config the script asks for limits and folder handling interactively. "
+               "Naming playlists or passing --limit, --limit-for, --existing or --report implies --batch.")
+    parser.add_argument('playlists', nargs='*', help="playlists to process (default: all .m3u files)")
+    parser.add_argument('--batch', action='store_true', default=None,
+                        help="run without prompts, for cron jobs and systemd timers")
+    parser.add_argument('--config', help="JSON file with batch settings (implies --batch)")
+    parser.add_argument('--limit', help="entries to process per playlist: 'all' or a number (default: all)")
+    parser.add_argument('--limit-for', action='append', default=[], metavar='PLAYLIST=N',
+                        help="limit for a single playlist (repeatable)")
+    parser.add_argument('--existing', choices=EXISTING_POLICIES,
+                        help="existing output folders: delete and rebuild, keep and add, or skip the playlist "
+                             "(default: keep)")
+    parser.add_argument('--rules', help="filter rules file (default: filter_rules.txt)")
+    parser.add_argument('--layouts', help="layouts file (default: layouts.json)")
+    parser.add_argument('--writer', choices=WRITER_BACKENDS, help="writer backend")
+    parser.add_argument('--check-urls', action='store_true', default=None, help="check stream URLs before writing")
+    parser.add_argument('--dead-urls', choices=('skip', 'quarantine'), help="what to do with dead stream URLs")
+    parser.add_argument('--url-workers', type=int, help="concurrent URL checks")
+    parser.add_argument('--url-per-host', type=int, help="connections per host for URL checks")
+    parser.add_argument('--url-rate-limit', type=float, help="URL checks per second per host, 0 for no limit")
+    parser.add_argument('--url-ttl', type=int, help="seconds to cache URL check results")
+    parser.add_argument('--report', help="write a JSON run report to this file")
+    return parser.parse_args(argv)
 
-def main():
-    """Main entry point"""
+def check_setting_types(settings):
+    """Raise ValueError for settings of the wrong type or out of range"""
+    for key, expected in SETTING_TYPES.items():
+        value = settings[key]
+        expected = expected if isinstance(expected, tuple) else (expected,)
+        # bool is a subclass of int, so only accept it where bool is expected
+        if not isinstance(value, expected) or (isinstance(value, bool) and bool not in expected):
+            names = " or ".join('null' if t is NONE_TYPE else t.__name__ for t in expected)
+            raise ValueError(f"Setting '{key}' must be {names}, got {json.dumps(value)}")
+
+    if not all(isinstance(playlist, str) for playlist in settings['playlists']):
+        raise ValueError("Setting 'playlists' must be a list of file names")
+    for key in ('url_workers', 'url_per_host'):
+        if settings[key] < 1:
+            raise ValueError(f"Setting '{key}' must be at least 1, got {settings[key]}")
+    for key in ('url_rate_limit', 'url_ttl'):
+        if settings[key] < 0:
+            raise ValueError(f"Setting '{key}' can't be negative, got {settings[key]}")
+
+def load_settings(args):
+    """
+    Merge the defaults, the config file and the command line arguments
+    Command line arguments take precedence over the config file
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError(f"{args.config}: expected a JSON object")
+        unknown = [key for key in config if key not in DEFAULT_SETTINGS]
+        if unknown:
+            raise ValueError(f"{args.config}: unknown settings: {', '.join(unknown)}")
+        settings.update(config)
+        settings['batch'] = True
+
+    if any(getattr(args, option) for option in BATCH_OPTIONS):
+        settings['batch'] = True
+
+    for key in DEFAULT_SETTINGS:
+        value = getattr(args, key, None)
+        if value is not None and value != []:
+            settings[key] = value
+
+    check_setting_types(settings)
+    settings['limits'] = dict(settings['limits'])
+    for item in args.limit_for:
+        playlist, sep, limit = item.rpartition('=')
+        if not sep or not playlist:
+            raise ValueError(f"Invalid --limit-for '{item}' (expected PLAYLIST=N)")
+        settings['limits'][playlist] = limit
+
+    if settings['existing'] not in EXISTING_POLICIES:
+        raise ValueError(f"Invalid existing-folder policy '{settings['existing']}'")
+    if settings['dead_urls'] not in ('skip', 'quarantine'):
+        raise ValueError(f"Invalid dead URL policy '{settings['dead_urls']}'")
+    if settings['writer'] not in WRITER_BACKENDS:
+        raise ValueError(f"Invalid writer backend '{settings['writer']}'")
+    for limit in [settings['limit'], *settings['limits'].values()]:
+        parse_limit(limit, 1)
+    return settings
+
+def write_run_report(report_path, report):
+    """Write the JSON run report"""
     try:
-        current_directory = os.getcwd()
-        m3u_files = [f for f in os.listdir(current_directory) if f.endswith(".m3u")]
+        tmp_path = f"{report_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, report_path)
+        return True
+    except Exception as e:
+        print(f"Error writing run report {report_path}: {str(e)}")
+        return False
+
+def get_exit_code(results):
+    """Get the exit code reflecting the playlist results and error counts"""
+    if any(result['status'] == 'failed' for result in results):
+        return EXIT_FAILED
+    if any(result.get('errors', 0) for result in results):
+        return EXIT_ERRORS
+    return EXIT_OK
+
+def run(settings, report):
+    """
+    Run the conversion for all playlists, recording results in report
+    Returns the exit code
+    """
+    results = report['playlists']
+
+    current_directory = os.getcwd()
+    # Skip quarantine playlists written by the URL health check
+    m3u_files = settings['playlists'] or sorted(
+        f for f in os.listdir(current_directory)
+        if f.endswith(".m3u") and not f.endswith(QUARANTINE_SUFFIX))
+    
+    if not m3u_files:
+        print("No .m3u files found in the current directory.")
+        return EXIT_OK
+
+    # Load and compile filter rules and layouts once for all files
+    try:
+        rule_filter = load_rule_filter(settings['rules'])
+        layouts = load_layouts(settings['layouts'])
+    except (OSError, ValueError) as e:
+        print(f"Error in configuration: {str(e)}")
+        report['error'] = str(e)
+        return EXIT_FAILED
+    if rule_filter:
+        print(f"Loaded {len(rule_filter.rules)} filter rules.")
         
-        if not m3u_files:
-            print("No .m3u files found in the current directory.")
-            return
-            
-        # Get processing information for all files upfront
-        processing_info = get_processing_info(m3u_files)
-        if not processing_info:
-            return
-            
-        print("\nStarting processing...")
+    # Get processing information for all files upfront
+    processing_info = get_processing_info(m3u_files, layouts, settings)
+    if processing_info is None:
+        return EXIT_CANCELLED
+    missing = [m3u_file for m3u_file in m3u_files if m3u_file not in processing_info]
+    for m3u_file in missing:
+        # A playlist that can't be read is a failure; an empty one is just skipped
+        status = 'skipped' if os.path.isfile(m3u_file) else 'failed'
+        results.append({'playlist': m3u_file, 'status': status})
+    if not processing_info:
+        return get_exit_code(results)
+        
+    url_checker = None
+    if settings['check_urls']:
+        url_checker = URLHealthChecker(settings['url_workers'], settings['url_per_host'],
+                                       settings['url_rate_limit'], ttl=settings['url_ttl'])
+        
+    print("\nStarting processing...")
+    try:
         for m3u_file, info in processing_info.items():
-            process_m3u_file(m3u_file, info)
-            
+            process_m3u_file(m3u_file, info, layouts, rule_filter, url_checker, settings, results)
+    finally:
+        if url_checker:
+            url_checker.close()
+            print(url_checker.get_summary_line())
+            report['url_checks'] = url_checker.get_report()
+
+    return get_exit_code(results)
+
+def main(argv=None):
+    """
+    Main entry point
+    Returns the exit code: 0 on success, 1 if entries had errors,
+    2 if a playlist or the configuration failed, 130 if cancelled
+    """
+    args = parse_args(argv)
+    try:
+        settings = load_settings(args)
+    except (OSError, ValueError) as e:
+        print(f"Error in configuration: {str(e)}")
+        return EXIT_FAILED
+
+    start = time.monotonic()
+    exit_code = EXIT_FAILED
+    report = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'settings': settings,
+        'playlists': []
+    }
+    try:
+        exit_code = run(settings, report)
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
+        exit_code = EXIT_CANCELLED
     except Exception as e:
         print(f"An unexpected error occurred: {str(e)}")
+        report['error'] = str(e)
+    finally:
+        report['finished'] = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+        report['elapsed'] = round(time.monotonic() - start, 3)
+        report['exit_code'] = exit_code
+        if settings['report']:
+            write_run_report(settings['report'], report)
+    return exit_code
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
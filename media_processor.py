@@ -1,121 +1,184 @@
 import os
-from utils import is_english_name, sanitize_filename, extract_show_info, reorder_mixed_language
-from file_operations import safe_create_dir, safe_write_file
+from utils import is_english_name
+from file_operations import PathWriter
+from layouts import build_entry_fields
+
+QUARANTINE_SUFFIX = "-dead.m3u"
+
+# Skip reason for English names, next to the filter rule labels
+SKIP_ENGLISH = "English name"
+
+# Default for process_entry when the caller hasn't run the filters yet
+NOT_CHECKED = object()
 
 class MediaProcessor:
-    def __init__(self, output_dir_grouped, output_dir_flat):
-        self.output_dir_grouped = output_dir_grouped
-        self.output_dir_flat = output_dir_flat
+    def __init__(self, output_base, layouts, rule_filter=None, writer=None, quarantine_dead=False):
+        self.output_base = output_base
+        self.layout_dirs = [(layout, layout.output_dir(output_base)) for layout in layouts]
+        self.rule_filter = rule_filter
+        self.writer = writer or PathWriter()
+        for _, root_dir in self.layout_dirs:
+            self.writer.add_root(root_dir)
+        self.quarantine_path = f"{output_base}{QUARANTINE_SUFFIX}" if quarantine_dead else None
+        self.created_dirs = set()
+        if self.quarantine_path:
+            self.reset_quarantine()
         self.processed_count = 0
         self.skipped_english_count = 0
+        self.skipped_filtered_count = 0
+        self.skipped_dead_count = 0
         self.error_count = 0
         self.total_processed = 0
 
-    def process_show(self, tvg_name, group_title, stream_url):
-        """Process a TV show entry"""
-        show_name, season, episode = extract_show_info(tvg_name)
-        if not (show_name and season and episode):
+    def plan_paths(self, tvg_name, group_title, is_tvshow):
+        """
+        Build the .strm paths for an entry in every layout from one parse
+        Returns a list of paths, or None if the entry can't be placed
+        """
+        fields = build_entry_fields(tvg_name, group_title, is_tvshow)
+        if fields is None:
             print(f"\nSkipping '{tvg_name}' as it doesn't match TV show format.")
-            return False
+            return None
 
-        # Create grouped structure (with group-title)
-        group_dir = os.path.join(self.output_dir_grouped, sanitize_filename(group_title))
-        show_dir_grouped = os.path.join(group_dir, sanitize_filename(show_name))
-        season_dir_grouped = os.path.join(show_dir_grouped, f"Season {season.zfill(2)}")
-        
-        # Create flat structure (without group-title)
-        show_dir_flat = os.path.join(self.output_dir_flat, sanitize_filename(show_name))
-        season_dir_flat = os.path.join(show_dir_flat, f"Season {season.zfill(2)}")
-        
-        # Create all necessary directories
-        dirs_to_create = [
-            group_dir,
-            show_dir_grouped,
-            season_dir_grouped,
-            show_dir_flat,
-            season_dir_flat
-        ]
-        
-        for dir_path in dirs_to_create:
-            if not safe_create_dir(dir_path):
-                return False
+        paths = []
+        for layout, root_dir in self.layout_dirs:
+            path = layout.build_path(root_dir, fields, is_tvshow)
+            if path is None:
+                print(f"\nSkipping '{tvg_name}' as it has an empty path in the '{layout.name}' layout.")
+                return None
+            paths.append(path)
+        return paths
 
-        # Create the strm filename with season and episode
-        strm_filename = f"S{season.zfill(2)}E{episode.zfill(2)}.strm"
-        strm_file_path_grouped = os.path.join(season_dir_grouped, strm_filename)
-        strm_file_path_flat = os.path.join(season_dir_flat, strm_filename)
-
-        # Write both .strm files
-        return (safe_write_file(strm_file_path_grouped, stream_url) and 
-                safe_write_file(strm_file_path_flat, stream_url))
-
-    def process_movie(self, tvg_name, group_title, stream_url):
-        """Process a movie entry"""
-        # Reorder mixed language parts in movie name
-        movie_name = reorder_mixed_language(tvg_name)
-        
-        # Create grouped structure (with group-title)
-        group_dir = os.path.join(self.output_dir_grouped, sanitize_filename(group_title))
-        movie_dir_grouped = os.path.join(group_dir, sanitize_filename(movie_name))
-        
-        # Create flat structure (without group-title)
-        movie_dir_flat = os.path.join(self.output_dir_flat, sanitize_filename(movie_name))
-        
-        # Create all necessary directories
-        dirs_to_create = [
-            group_dir,
-            movie_dir_grouped,
-            movie_dir_flat
-        ]
-        
-        for dir_path in dirs_to_create:
-            if not safe_create_dir(dir_path):
+    def ensure_dirs(self, paths):
+        """Create the parent directories of paths, skipping ones already created"""
+        for path in paths:
+            dir_path = os.path.dirname(path)
+            if dir_path in self.created_dirs:
+                continue
+            if not self.writer.create_dir(dir_path):
                 return False
+            self.created_dirs.add(dir_path)
+        return True
+
+    def process_paths(self, paths, stream_url):
+        """Write the .strm file to every planned path"""
+        if not self.ensure_dirs(paths):
+            return False
+        return all(self.writer.write_file(path, stream_url) for path in paths)
+
+    def get_skip_reason(self, tvg_name, group_title):
+        """
+        Check an entry against the filters without counting it
+        Returns the label of the rejecting filter rule, SKIP_ENGLISH, or None
+        """
+        # Apply include/exclude rules before building any paths
+        if self.rule_filter:
+            rule = self.rule_filter.match(tvg_name, group_title)
+            if rule:
+                return rule
+        if is_english_name(tvg_name):
+            return SKIP_ENGLISH
+        return None
 
-        # Create .strm files in both locations
-        strm_filename = "movie.strm"
-        strm_file_path_grouped = os.path.join(movie_dir_grouped, strm_filename)
-        strm_file_path_flat = os.path.join(movie_dir_flat, strm_filename)
+    def reset_quarantine(self):
+        """Remove the previous run's quarantine playlist so it can't look current"""
+        try:
+            os.remove(self.quarantine_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error removing file {self.quarantine_path}: {str(e)}")
 
-        # Write both .strm files
-        return (safe_write_file(strm_file_path_grouped, stream_url) and 
-                safe_write_file(strm_file_path_flat, stream_url))
+    def quarantine_entry(self, tvg_name, group_title, stream_url):
+        """Append a dead entry to the quarantine playlist"""
+        try:
+            with open(self.quarantine_path, 'a', encoding='utf-8') as f:
+                if f.tell() == 0:
+                    f.write("#EXTM3U\n")
+                f.write(f'#EXTINF:-1 tvg-name="{tvg_name}" group-title="{group_title}",{tvg_name}\n')
+                f.write(f"{stream_url}\n")
+        except Exception as e:
+            print(f"Error writing file {self.quarantine_path}: {str(e)}")
 
-    def process_entry(self, tvg_name, group_title, stream_url, is_tvshow):
-        """Process a single media entry"""
+    def process_entry(self, tvg_name, group_title, stream_url, is_tvshow, is_alive=True,
+                      skip_reason=NOT_CHECKED):
+        """
+        Process a single media entry
+        skip_reason is the result of get_skip_reason if the caller already has it
+        """
         self.total_processed += 1
-        
-        # Skip if the name is in English
-        if is_english_name(tvg_name):
+
+        if skip_reason is NOT_CHECKED:
+            skip_reason = self.get_skip_reason(tvg_name, group_title)
+        if skip_reason == SKIP_ENGLISH:
             self.skipped_english_count += 1
             return False
+        if skip_reason:
+            self.rule_filter.record(skip_reason)
+            self.skipped_filtered_count += 1
+            return False
+
+        # Skip dead stream URLs found by the health check
+        if not is_alive:
+            self.skipped_dead_count += 1
+            if self.quarantine_path:
+                self.quarantine_entry(tvg_name, group_title, stream_url)
+            return False
+
+        paths = self.plan_paths(tvg_name, group_title, is_tvshow)
+        success = paths is not None and self.process_paths(paths, stream_url)
 
-        success = False
-        if is_tvshow:
-            success = self.process_show(tvg_name, group_title, stream_url)
-        else:
-            success = self.process_movie(tvg_name, group_title, stream_url)
-        
         if success:
             self.processed_count += 1
         else:
             self.error_count += 1
-            
+
         return success
 
     def get_progress_message(self, num_to_process):
         """Get the current progress message"""
-        return (f"Processed {self.processed_count}/{num_to_process} "
-                f"(Skipped {self.skipped_english_count} English names)...")
+        message = (f"Processed {self.processed_count}/{num_to_process} "
+                   f"(Skipped {self.skipped_english_count} English names")
+        if self.rule_filter:
+            message += f", {self.skipped_filtered_count} filtered"
+        return message + ")..."
+
+    def get_report(self):
+        """Get the counters for the run report"""
+        report = {
+            'processed': self.processed_count,
+            'skipped_english': self.skipped_english_count,
+            'skipped_filtered': self.skipped_filtered_count,
+            'skipped_dead': self.skipped_dead_count,
+            'errors': self.error_count,
+            'total': self.total_processed,
+            'writer': self.writer.name
+        }
+        if self.rule_filter:
+            report['filter_rules'] = {label: count for label, count in self.rule_filter.match_counts.items()
+                                      if count}
+        return report
 
     def get_completion_summary(self, m3u_file):
         """Get the completion summary"""
-        return [
+        summary = [
             f"\nCompleted processing '{m3u_file}':",
             f"- Successfully created: {self.processed_count} files",
             f"- Skipped English names: {self.skipped_english_count}",
+        ]
+        if self.rule_filter:
+            summary.append(f"- Skipped by filter rules: {self.skipped_filtered_count}")
+            summary.extend(self.rule_filter.get_summary_lines())
+        if self.skipped_dead_count:
+            action = "Quarantined" if self.quarantine_path else "Skipped"
+            summary.append(f"- {action} dead URLs: {self.skipped_dead_count}")
+        summary.extend([
             f"- Errors encountered: {self.error_count}",
             f"- Total processed: {self.total_processed}",
-            f"Grouped structure in: '{self.output_dir_grouped}'",
-            f"Flat structure in: '{self.output_dir_flat}'"
-        ]
+            self.writer.get_summary_line()
+        ])
+        for layout, root_dir in self.layout_dirs:
+            summary.append(f"{layout.name.capitalize()} structure in: '{root_dir}'")
+        if self.quarantine_path and self.skipped_dead_count:
+            summary.append(f"Dead entries in: '{self.quarantine_path}'")
+        return summary
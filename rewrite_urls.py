@@ -0,0 +1,181 @@
+"""
+Rewrite stream URLs in existing .strm trees in place.
+
+Used when the provider rotates the host or account credentials embedded in
+the URLs, instead of deleting and rebuilding every output tree:
+
+    python3 rewrite_urls.py --replace old.host:8080 new.host:80 \\
+                            --replace /olduser/oldpass/ /newuser/newpass/ \\
+                            wetv_shows wetv_shows-flat
+
+Only files whose contents change are rewritten; they are truncated and
+written in place, so directory entries and the mtimes of all other files
+are left alone.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def load_substitution_map(map_path):
+    """
+    Load substitutions from a file with one 'old new' pair per line
+    Lines starting with '#' are comments
+    """
+    substitutions = {}
+    with open(map_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            if len(parts) != 2:
+                raise ValueError(f"{map_path}:{line_number}: expected 'old new', got '{line}'")
+            substitutions[parts[0]] = parts[1]
+    return substitutions
+
+def compile_substitutions(substitutions):
+    """
+    Compile all substitutions into a single alternation
+    Longer strings are tried first so overlapping keys resolve predictably
+    """
+    keys = sorted(substitutions, key=len, reverse=True)
+    return re.compile("|".join(re.escape(key) for key in keys))
+
+def iter_strm_files(dir_path):
+    """Yield the paths of all .strm files below dir_path"""
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from iter_strm_files(entry.path)
+                elif entry.name.endswith('.strm') and entry.is_file(follow_symlinks=False):
+                    yield entry.path
+    except OSError as e:
+        print(f"Error reading directory {dir_path}: {str(e)}")
+
+def rewrite_file(file_path, pattern, substitutions, dry_run=False):
+    """
+    Rewrite a single .strm file if any substitution applies
+    Returns True if the file was (or would be) rewritten
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    new_content = pattern.sub(lambda match: substitutions[match.group(0)], content)
+    if new_content == content:
+        return False
+
+    if not dry_run:
+        # Write in place rather than replacing the file, so the parent
+        # directory entry (and its mtime) is untouched
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+    return True
+
+def rewrite_tree(dir_path, pattern, substitutions, dry_run=False):
+    """
+    Rewrite all .strm files below dir_path
+    Returns (scanned, rewritten, errors)
+    """
+    scanned = rewritten = errors = 0
+    for file_path in iter_strm_files(dir_path):
+        scanned += 1
+        try:
+            if rewrite_file(file_path, pattern, substitutions, dry_run):
+                rewritten += 1
+        except Exception as e:
+            errors += 1
+            print(f"Error rewriting file {file_path}: {str(e)}")
+    return scanned, rewritten, errors
+
+def split_into_tasks(root_dirs):
+    """
+    Split the output trees into independent work items: each top-level
+    subdirectory becomes its own task, so walking is parallelized too
+    Returns (subtree paths, .strm files directly in a root)
+    """
+    subtrees = []
+    root_files = []
+    for root_dir in root_dirs:
+        with os.scandir(root_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subtrees.append(entry.path)
+                elif entry.name.endswith('.strm') and entry.is_file(follow_symlinks=False):
+                    root_files.append(entry.path)
+    return subtrees, root_files
+
+def rewrite_trees(root_dirs, substitutions, workers=8, dry_run=False):
+    """
+    Apply substitutions across output trees in parallel
+    Returns (scanned, rewritten, errors)
+    """
+    pattern = compile_substitutions(substitutions)
+    subtrees, root_files = split_into_tasks(root_dirs)
+
+    scanned = len(root_files)
+    rewritten = errors = 0
+    for file_path in root_files:
+        try:
+            if rewrite_file(file_path, pattern, substitutions, dry_run):
+                rewritten += 1
+        except Exception as e:
+            errors += 1
+            print(f"Error rewriting file {file_path}: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda subtree: rewrite_tree(subtree, pattern, substitutions, dry_run),
+                               subtrees)
+        for tree_scanned, tree_rewritten, tree_errors in results:
+            scanned += tree_scanned
+            rewritten += tree_rewritten
+            errors += tree_errors
+    return scanned, rewritten, errors
+
+def main(argv=None):
+    """Main entry point; returns the process exit code"""
+    parser = argparse.ArgumentParser(description="Rewrite stream URLs in existing .strm trees in place.")
+    parser.add_argument('dirs', nargs='+', help="output directories to rewrite")
+    parser.add_argument('--replace', nargs=2, action='append', default=[], metavar=('OLD', 'NEW'),
+                        help="replace OLD with NEW in every URL (repeatable)")
+    parser.add_argument('--map-file', help="file with one 'old new' substitution per line")
+    parser.add_argument('--workers', type=int, default=8, help="number of parallel workers (default: 8)")
+    parser.add_argument('--dry-run', action='store_true', help="only report which files would change")
+    args = parser.parse_args(argv)
+
+    try:
+        substitutions = load_substitution_map(args.map_file) if args.map_file else {}
+    except (OSError, ValueError) as e:
+        print(f"Error loading substitution map: {str(e)}")
+        return 2
+    substitutions.update(dict(args.replace))
+    substitutions = {old: new for old, new in substitutions.items() if old and old != new}
+    if not substitutions:
+        print("No substitutions given. Use --replace OLD NEW or --map-file.")
+        return 2
+
+    missing = [d for d in args.dirs if not os.path.isdir(d)]
+    if missing:
+        print(f"Error: not a directory: {', '.join(missing)}")
+        return 2
+
+    start = time.monotonic()
+    scanned, rewritten, errors = rewrite_trees(args.dirs, substitutions, max(1, args.workers), args.dry_run)
+    elapsed = time.monotonic() - start
+
+    action = "Would rewrite" if args.dry_run else "Rewrote"
+    print(f"Scanned {scanned} .strm files in {elapsed:.1f}s")
+    print(f"- {action}: {rewritten} files")
+    print(f"- Unchanged: {scanned - rewritten - errors} files")
+    print(f"- Errors encountered: {errors}")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user.")
+        sys.exit(130)
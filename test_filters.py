@@ -0,0 +1,48 @@
+"""
+Checks the combined include/exclude rule matching in RuleFilter.
+
+Run with: python3 -m unittest test_filters
+"""
+import unittest
+from filters import RuleFilter, scope_inline_flags
+
+class RuleFilterTest(unittest.TestCase):
+    def test_backreferences_rejected(self):
+        for value in (r'(a)\1', r'(?P<name>a)', r'(?P=name)', r'(?<name>a)', r'(a)(?(1)b)',
+                      r'(a)\g<1>', r'\\\1'):
+            with self.assertRaises(ValueError, msg=value):
+                RuleFilter([('exclude', 'title', '~', value)])
+
+    def test_escaped_backslash_accepted(self):
+        rule_filter = RuleFilter([('exclude', 'title', '~', r'a\\1'),
+                                  ('exclude', 'title', '~', r'(?<=x)y(?<!z)')])
+        self.assertEqual(rule_filter.match('a\\1', ''), r'exclude title ~ a\\1')
+        self.assertEqual(rule_filter.match('xy', ''), r'exclude title ~ (?<=x)y(?<!z)')
+        self.assertIsNone(rule_filter.match('a1', ''))
+
+    def test_lastgroup_maps_to_rule_label(self):
+        rule_filter = RuleFilter([
+            ('exclude', 'title', '~', r'\bcam\b', 'cam'),
+            ('exclude', 'title', '~', r'(trailer|teaser)', 'trailer'),
+            ('exclude', 'title', '~', r'(?i)^promo', 'promo'),
+            ('exclude', 'group', '~', r'^sports?\b', 'sports'),
+            ('exclude', 'group', '=', 'Adult 18+', 'adult'),
+        ])
+        self.assertEqual(rule_filter.match('Movie CAM', 'Films'), 'cam')
+        self.assertEqual(rule_filter.match('Movie Teaser', 'Films'), 'trailer')
+        self.assertEqual(rule_filter.match('Promo reel', 'Films'), 'promo')
+        self.assertEqual(rule_filter.match('Match', 'Sport HD'), 'sports')
+        self.assertEqual(rule_filter.match('Movie', 'adult 18+'), 'adult')
+        self.assertIsNone(rule_filter.match('Movie', 'Films'))
+
+    def test_include_rules(self):
+        rule_filter = RuleFilter([('include', 'group', '~', 'arabic')])
+        self.assertIsNone(rule_filter.match('Movie', 'Arabic Movies'))
+        self.assertEqual(rule_filter.match('Movie', 'Films'), 'no include group rule matched')
+
+    def test_scope_inline_flags(self):
+        self.assertEqual(scope_inline_flags('(?i)abc'), '(?i:abc)')
+        self.assertEqual(scope_inline_flags('abc(?i)'), 'abc(?i)')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Checks URLHealthChecker against a local stand-in HTTP server.
+
+Run with: python3 -m unittest test_health_check
+"""
+import base64
+import http.server
+import os
+import tempfile
+import threading
+import time
+import unittest
+from health_check import URLHealthChecker
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Answers like an IPTV server, with the behaviour picked by the path"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, send_body):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path, dict(self.headers)))
+            server.client_ports.add(self.client_address[1])
+
+        if 'slow' in self.path:
+            time.sleep(server.slow_delay)
+        if self.path.startswith('/redirect/'):
+            # Send the client to the rest of the path, like an edge server redirect
+            self.send_response(302)
+            self.send_header('Location', self.path[len('/redirect'):])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if 'dead' in self.path:
+            status = 404
+        elif 'broken' in self.path:
+            status = 503
+        elif 'nohead' in self.path and self.command == 'HEAD':
+            status = 405
+        elif 'private' in self.path and self.headers.get('Authorization') != server.expected_auth:
+            status = 401
+        else:
+            status = 206 if self.headers.get('Range') else 200
+
+        self.send_response(status)
+        self.send_header('Content-Length', '1' if send_body else '0')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(b'x')
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def do_GET(self):
+        self._respond(True)
+
+class URLHealthCheckerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.client_ports = set()
+        self.server.slow_delay = 0
+        self.server.expected_auth = "Basic " + base64.b64encode(b"user:pa ss").decode('ascii')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, 'cache.json')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def make_checker(self, **kwargs):
+        kwargs.setdefault('workers', 8)
+        kwargs.setdefault('per_host', 4)
+        return URLHealthChecker(cache_path=self.cache_path, **kwargs)
+
+    def test_alive_and_dead(self):
+        checker = self.make_checker()
+        alive_url = f"{self.base}/u/p/1.mp4?token=1"
+        dead_url = f"{self.base}/u/p/dead.mp4"
+        results = checker.check_many([alive_url, dead_url, 'http://127.0.0.1:1/refused'])
+        checker.close()
+        self.assertEqual(results, {alive_url: True, dead_url: False, 'http://127.0.0.1:1/refused': False})
+
+    def test_ranged_get_when_head_not_allowed(self):
+        checker = self.make_checker()
+        url = f"{self.base}/nohead.ts"
+        self.assertEqual(checker.check_many([url]), {url: True})
+        checker.close()
+        methods = [(method, headers.get('Range')) for method, path, headers in self.server.requests]
+        self.assertEqual(methods, [('HEAD', None), ('GET', 'bytes=0-0')])
+
+    def test_connections_are_reused(self):
+        checker = self.make_checker()
+        urls = [f"{self.base}/ok{i}" for i in range(100)]
+        self.assertTrue(all(checker.check_many(urls).values()))
+        checker.close()
+        self.assertEqual(len(self.server.requests), 100)
+        self.assertLessEqual(len(self.server.client_ports), 4)
+
+    def test_definite_results_cached(self):
+        urls = [f"{self.base}/ok", f"{self.base}/dead"]
+        checker = self.make_checker()
+        checker.check_many(urls)
+        checker.close()
+
+        checker = self.make_checker()
+        self.assertEqual(checker.check_many(urls), {urls[0]: True, urls[1]: False})
+        self.assertEqual(checker.get_report()['probed'], 0)
+        self.assertEqual(checker.get_report()['cached'], 2)
+        checker.close()
+
+    def test_transient_failures_not_cached(self):
+        self.server.slow_delay = 0.5
+        urls = [f"{self.base}/slow", f"{self.base}/broken"]
+        checker = self.make_checker(timeout=0.1)
+        self.assertEqual(checker.check_many(urls), {urls[0]: False, urls[1]: False})
+        checker.close()
+
+        self.server.slow_delay = 0
+        checker = self.make_checker(timeout=0.1)
+        self.assertEqual(checker.check_many(urls), {urls[0]: True, urls[1]: False})
+        self.assertEqual(checker.get_report()['probed'], 2)
+        checker.close()
+
+    def test_credentials_sent_as_basic_auth(self):
+        checker = self.make_checker()
+        host = self.base.split('//', 1)[1]
+        url = f"http://user:pa%20ss@{host}/private/1.mp4"
+        self.assertEqual(checker.check_many([url]), {url: True})
+        checker.close()
+
+    def test_redirects_followed(self):
+        checker = self.make_checker()
+        alive_url = f"{self.base}/redirect/ok.ts"
+        dead_url = f"{self.base}/redirect/dead.ts"
+        looping_url = f"{self.base}/redirect/redirect/redirect/redirect/ok.ts"
+        results = checker.check_many([alive_url, dead_url, looping_url])
+        checker.close()
+        self.assertEqual(results, {alive_url: True, dead_url: False, looping_url: False})
+        # Too many redirects may be a temporary misconfiguration, so it isn't cached
+        self.assertNotIn(looping_url, checker.cache)
+        self.assertIn(dead_url, checker.cache)
+
+    def test_non_ascii_and_malformed_urls(self):
+        checker = self.make_checker()
+        arabic_url = f"{self.base}/u/p/فيلم.mp4?name=فيلم"
+        malformed_urls = ["http://127.0.0.1:1/فيلم.mp4x", f"{self.base}:bad/1.mp4", "ftp://host/1.mp4",
+                          "http://host\n/1.mp4"]
+        results = checker.check_many([arabic_url] + malformed_urls)
+        checker.close()
+        self.assertTrue(results[arabic_url])
+        self.assertFalse(any(results[url] for url in malformed_urls))
+        path = self.server.requests[0][1]
+        self.assertEqual(path, '/u/p/%D9%81%D9%8A%D9%84%D9%85.mp4?name=%D9%81%D9%8A%D9%84%D9%85')
+
+    def test_rate_limit_spaces_requests(self):
+        checker = self.make_checker(rate_limit=50)
+        start = time.monotonic()
+        checker.check_many([f"{self.base}/ok{i}" for i in range(11)])
+        checker.close()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+if __name__ == "__main__":
+    unittest.main()
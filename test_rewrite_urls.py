@@ -0,0 +1,64 @@
+"""
+Checks rewrite_urls against a small .strm tree in a temporary directory.
+
+Run with: python3 -m unittest test_rewrite_urls
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from rewrite_urls import main
+
+OLD_TIME = 1000000000
+
+class RewriteUrlsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp_dir.name, 'wetv_shows')
+        self.files = {
+            os.path.join(self.root, 'root.strm'): "http://old.host:8080/u/p/1.mp4",
+            os.path.join(self.root, 'Show', 'Season 01', 'S01E01.strm'): "http://old.host:8080/u/p/2.mp4",
+            os.path.join(self.root, 'Show', 'Season 01', 'S01E02.strm'): "http://other.host/u/p/3.mp4",
+            os.path.join(self.root, 'Other', 'movie.strm'): "http://other.host/u/p/4.mp4",
+        }
+        for path, content in self.files.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.utime(path, (OLD_TIME, OLD_TIME))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def rewrite(self, *args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return main(list(args) + [self.root])
+
+    def read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_substitution_applied(self):
+        self.assertEqual(self.rewrite('--replace', 'old.host:8080', 'new.host', '--replace', '/u/p/', '/v/q/'), 0)
+        for path, content in self.files.items():
+            expected = content.replace('old.host:8080', 'new.host').replace('/u/p/', '/v/q/')
+            self.assertEqual(self.read(path), expected)
+
+    def test_unmatched_files_keep_mtime(self):
+        self.assertEqual(self.rewrite('--replace', 'old.host:8080', 'new.host'), 0)
+        for path, content in self.files.items():
+            changed = 'old.host' in content
+            self.assertEqual(os.stat(path).st_mtime != OLD_TIME, changed, path)
+
+    def test_dry_run_writes_nothing(self):
+        self.assertEqual(self.rewrite('--dry-run', '--replace', 'old.host:8080', 'new.host'), 0)
+        for path, content in self.files.items():
+            self.assertEqual(self.read(path), content)
+            self.assertEqual(os.stat(path).st_mtime, OLD_TIME)
+
+    def test_no_substitutions(self):
+        self.assertEqual(self.rewrite('--replace', 'same', 'same'), 2)
+
+if __name__ == "__main__":
+    unittest.main()
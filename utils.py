@@ -120,3 +120,24 @@ def extract_show_info(stream_name):
         episode = match.group(3)
         return show_name, season, episode
     return None, None, None
+
+def detect_language(text):
+    """
+    Classify the language of a title for by-language layouts.
+    Returns 'Dubbed', 'Arabic', 'English' or 'Other'
+    """
+    if text.strip().endswith('مدبلج'):
+        return 'Dubbed'
+    if any(is_arabic_char(c) for c in text):
+        return 'Arabic'
+    if is_english_name(text):
+        return 'English'
+    return 'Other'
+
+def extract_year(text):
+    """
+    Extract a release year like 1999 or 2023 from a title
+    Returns the year as a string, or None if there isn't one
+    """
+    match = re.search(r'(?<!\d)(19\d{2}|20\d{2})(?!\d)', text)
+    return match.group(1) if match else None